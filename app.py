@@ -5,14 +5,29 @@ import sqlite3
 import datetime
 import requests
 import json
+import re
+import hashlib
+import gzip
+import threading
+from contextlib import contextmanager
 import pdfplumber
-from flask import Flask, render_template, url_for, session, redirect, request
+from flask import Flask, render_template, url_for, session, redirect, request, make_response
 from authlib.integrations.flask_client import OAuth
 from dotenv import load_dotenv
 from groq import Groq
 from pypdf import PdfReader
 from werkzeug.middleware.proxy_fix import ProxyFix
 
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None  # Fallback: rough 4-chars-per-token estimate
+
+try:
+    import brotli
+except ImportError:
+    brotli = None  # gzip only
+
 load_dotenv()
 
 app = Flask(__name__)
@@ -98,12 +113,40 @@ def init_db():
                 updated_at TEXT
             )
         ''')
+        # 5. Interview Question Bank
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS question_bank (
+                id SERIAL PRIMARY KEY,
+                company_key TEXT,
+                role_key TEXT,
+                q_type_key TEXT,
+                question TEXT,
+                hint TEXT,
+                answer TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (company_key, role_key, q_type_key, question)
+            )
+        ''')
+        # Also serves (company, role, type) lookups; backs ON CONFLICT / INSERT OR IGNORE on top-up
+        c.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_question_bank_unique ON question_bank (company_key, role_key, q_type_key, question)')
+        # 6. Questions already served to each user
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS question_seen (
+                user_email TEXT,
+                question_id INTEGER,
+                PRIMARY KEY (user_email, question_id)
+            )
+        ''')
     else:
         # SQLite Versions
         c.execute('CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT UNIQUE NOT NULL, name TEXT, picture TEXT, role TEXT, last_login TIMESTAMP DEFAULT CURRENT_TIMESTAMP, login_count INTEGER DEFAULT 1)')
         c.execute('CREATE TABLE IF NOT EXISTS reports (id INTEGER PRIMARY KEY AUTOINCREMENT, user_email TEXT, role TEXT, content TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)')
         c.execute('CREATE TABLE IF NOT EXISTS saved_jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, user_email TEXT, title TEXT, company TEXT, location TEXT, url TEXT, created_at TEXT)')
         c.execute('CREATE TABLE IF NOT EXISTS job_cache (search_key TEXT PRIMARY KEY, json_data TEXT, updated_at TEXT)')
+        c.execute('CREATE TABLE IF NOT EXISTS question_bank (id INTEGER PRIMARY KEY AUTOINCREMENT, company_key TEXT, role_key TEXT, q_type_key TEXT, question TEXT, hint TEXT, answer TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, UNIQUE (company_key, role_key, q_type_key, question))')
+        # Also serves (company, role, type) lookups; backs ON CONFLICT / INSERT OR IGNORE on top-up
+        c.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_question_bank_unique ON question_bank (company_key, role_key, q_type_key, question)')
+        c.execute('CREATE TABLE IF NOT EXISTS question_seen (user_email TEXT, question_id INTEGER, PRIMARY KEY (user_email, question_id))')
 
     conn.commit()
     conn.close()
@@ -118,6 +161,437 @@ def extract_text_from_pdf(file):
     except Exception as e:
         return ""
 
+# --- RESUME CONDENSER (Token-budgeted prompt input) ---
+
+# Prompt token budget for the resume text, per route
+RESUME_TOKEN_BUDGETS = {
+    'resume': 800,
+}
+
+# Heading phrases -> canonical section name. Plain lines must be exactly one of these
+# (or several joined by "&"/"and"); lines formatted as headings may add a prefix.
+RESUME_SECTION_HEADINGS = {
+    'summary': ['summary', 'profile', 'objective', 'about me', 'professional summary',
+                'profile summary', 'career summary', 'career objective'],
+    'skills': ['skills', 'technical skills', 'key skills', 'core skills', 'soft skills',
+               'competencies', 'core competencies', 'technologies', 'tech stack', 'tools'],
+    'experience': ['experience', 'work experience', 'professional experience', 'relevant experience',
+                   'employment', 'employment history', 'work history', 'internships', 'internship'],
+    'projects': ['projects', 'personal projects', 'academic projects', 'key projects', 'major projects'],
+    'education': ['education', 'academic background', 'qualifications', 'academic qualifications',
+                  'educational qualifications'],
+    'certifications': ['certifications', 'certificates', 'courses', 'achievements', 'awards', 'honors'],
+}
+RESUME_HEADING_MAX_WORDS = 5
+RESUME_HEADING_JOINER = re.compile(r'\s+(?:&|and)\s+')
+
+# Base importance when the role gives no extra signal
+RESUME_SECTION_WEIGHTS = {
+    'experience': 5, 'projects': 4, 'skills': 4, 'summary': 2,
+    'education': 2, 'certifications': 1, 'other': 1, 'header': 0,
+}
+
+RESUME_BOILERPLATE = re.compile(
+    r'^(page \d+( of \d+)?|references available( upon request)?|curriculum vitae|resume|cv)$', re.I)
+RESUME_CONTACT = re.compile(r'(@|https?://|www\.|linkedin\.com|github\.com)', re.I)
+RESUME_PHONE = re.compile(r'\+?\(?\d[\d\s().-]{8,}\d')
+RESUME_YEAR_RANGE = re.compile(r'\b(19|20)\d{2}(?:\s*[-\u2013\u2014]\s*|\s+to\s+)((19|20)\d{2}|present|current)\b', re.I)
+RESUME_CONTACT_LINES = 6  # Contact details only live at the very top
+
+_resume_cache = {}
+RESUME_CACHE_SIZE = 256
+
+_tokenizer = None
+_tokenizer_loaded = False
+
+def get_tokenizer():
+    """Load the BPE lazily: get_encoding() may download it, which shouldn't stall app boot"""
+    global _tokenizer, _tokenizer_loaded
+    if not _tokenizer_loaded:
+        _tokenizer_loaded = True
+        if tiktoken is not None:
+            try:
+                # cl100k is only an approximation of the Llama 3.1 tokenizer the routes use
+                _tokenizer = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                _tokenizer = None
+    return _tokenizer
+
+def count_tokens(text):
+    tokenizer = get_tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.encode(text))
+    return (len(text) + 3) // 4
+
+def truncate_to_tokens(text, max_tokens):
+    tokenizer = get_tokenizer()
+    if tokenizer is not None:
+        cut = tokenizer.decode(tokenizer.encode(text)[:max_tokens])
+    else:
+        cut = text[:max_tokens * 4]
+    if len(cut) >= len(text):
+        return text
+    # A cut BPE sequence can end mid-character; also avoid ending mid-word
+    cut = cut.rstrip('\ufffd')
+    if ' ' in cut.strip():
+        cut = cut[:cut.rstrip().rfind(' ')]
+    return cut.rstrip()
+
+def _is_contact_line(line):
+    if RESUME_CONTACT.search(line):
+        return True
+    for match in RESUME_PHONE.finditer(line):
+        digits = re.sub(r'\D', '', match.group())
+        if len(digits) >= 10 and not RESUME_YEAR_RANGE.search(match.group()):
+            return True
+    return False
+
+def _heading_section(phrase):
+    for section, phrases in RESUME_SECTION_HEADINGS.items():
+        if phrase in phrases:
+            return section
+    return None
+
+def _is_heading_formatted(line, text):
+    """ALL CAPS, or Title Case with a trailing colon"""
+    if text.isupper():
+        return True
+    words = [w for w in text.split() if w.isalpha() and w.lower() not in ('and', 'of')]
+    return line.rstrip().endswith(':') and all(w[0].isupper() for w in words)
+
+def _match_section_heading(line):
+    """Return the section a heading line opens; ambiguous lines stay body text"""
+    # Headings are short and never carry lists or dates
+    if ',' in line or re.search(r'\d', line):
+        return None
+    text = line.rstrip(':').strip()
+    key = re.sub(r'\s+', ' ', re.sub(r'[^a-z&]', ' ', text.lower())).strip()
+    words = [w for w in key.split() if w not in ('&', 'and')]
+    if not words or len(words) > RESUME_HEADING_MAX_WORDS:
+        return None
+
+    # "Technical Skills", "Work Experience & Internships"
+    sections = [_heading_section(part) for part in RESUME_HEADING_JOINER.split(key)]
+    if all(sections):
+        return sections[0]
+
+    # "RELEVANT WORK EXPERIENCE", "Selected Projects:" -- only when formatted as a heading, and
+    # only if the phrase ends the line or is joined by "&"/"and" ("PROJECT MANAGEMENT" is a skill)
+    if not _is_heading_formatted(line, text):
+        return None
+    for section, phrases in RESUME_SECTION_HEADINGS.items():
+        for phrase in phrases:
+            match = re.search(r'\b' + re.escape(phrase) + r'\b', key)
+            if match and (match.end() == len(key) or RESUME_HEADING_JOINER.match(key, match.end())):
+                return section
+    return None
+
+def split_resume_sections(text):
+    """Normalize whitespace, drop boilerplate and split into (section, lines) blocks"""
+    sections = [['header', []]]
+    seen = set()
+    for index, raw in enumerate(text.splitlines()):
+        line = re.sub(r'\s+', ' ', raw).strip(' \u2022\u25cf\u25aa-*|')
+        if not line or RESUME_BOILERPLATE.match(line):
+            continue
+        section = _match_section_heading(line)
+        if section:
+            sections.append([section, []])
+            continue
+        # Repeated page headers/footers and copy-pasted lines only cost tokens
+        fingerprint = line.lower()
+        if fingerprint in seen:
+            continue
+        seen.add(fingerprint)
+        if sections[-1][0] == 'header' and index < RESUME_CONTACT_LINES and _is_contact_line(line):
+            continue
+        sections[-1][1].append(line)
+    return [(name, lines) for name, lines in sections if lines]
+
+def _section_score(name, lines, role_terms):
+    body = ' '.join(lines).lower()
+    hits = sum(1 for term in role_terms if term in body)
+    return RESUME_SECTION_WEIGHTS.get(name, 1) + hits
+
+def condense_resume(text, target_role, route):
+    """Pack the most relevant resume sections for target_role into the route's token budget"""
+    budget = RESUME_TOKEN_BUDGETS.get(route, 600)
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    cache_key = (digest, (target_role or '').strip().lower(), route)
+    if cache_key in _resume_cache:
+        return _resume_cache[cache_key]
+
+    sections = split_resume_sections(text)
+    role_terms = [t for t in re.findall(r'[a-z0-9+#.]+', (target_role or '').lower()) if len(t) > 1]
+    ranked = sorted(range(len(sections)),
+                    key=lambda i: _section_score(sections[i][0], sections[i][1], role_terms),
+                    reverse=True)
+
+    remaining = budget
+    packed = {}
+    for i in ranked:
+        name, lines = sections[i]
+        heading = name.upper() + ":"
+        cost = count_tokens(heading) + 1
+        if cost >= remaining:
+            continue
+        kept = []
+        for line in lines:
+            line_cost = count_tokens(line) + 1
+            if cost + line_cost > remaining:
+                # Long pdfplumber paragraphs: keep the part that fits instead of losing the section
+                room = remaining - cost - 1
+                if room > 0:
+                    partial = truncate_to_tokens(line, room)
+                    if partial:
+                        kept.append(partial)
+                        cost += count_tokens(partial) + 1
+                break
+            kept.append(line)
+            cost += line_cost
+        if kept:
+            packed[i] = heading + "\n" + "\n".join(kept)
+            remaining -= cost
+
+    # Keep original document order so the model reads a coherent resume
+    condensed = "\n\n".join(packed[i] for i in sorted(packed))
+    if not condensed:
+        condensed = truncate_to_tokens(re.sub(r'\s+', ' ', text).strip(), budget)
+
+    if len(_resume_cache) >= RESUME_CACHE_SIZE:
+        _resume_cache.pop(next(iter(_resume_cache)))
+    _resume_cache[cache_key] = condensed
+    return condensed
+
+# --- INTERVIEW QUESTION BANK ---
+
+QUESTION_SIMILARITY_THRESHOLD = 0.8
+QUESTION_TOPUP_EXTRA = 3  # Generate a few spares so the next user hits the bank
+QUESTION_MAX_COUNT = 20
+QUESTION_TOPUP_ATTEMPTS = 2  # Retry once when the model returns too many near-duplicates
+QUESTION_AVOID_LIMIT = 30  # Existing questions listed in the prompt so the model skips them
+
+def normalize_bank_key(value):
+    return re.sub(r'[^a-z0-9+#]+', ' ', (value or '').lower()).strip()
+
+def _question_terms(question):
+    return set(re.findall(r'[a-z0-9+#]+', question.lower()))
+
+def is_similar_question(terms, other_terms):
+    if not terms or not other_terms:
+        return terms == other_terms
+    overlap = len(terms & other_terms) / len(terms | other_terms)
+    return overlap >= QUESTION_SIMILARITY_THRESHOLD
+
+def parse_question_items(raw):
+    """Pull [{question, hint, answer}, ...] out of the model's JSON reply"""
+    raw = raw.replace("```json", "").replace("```", "")
+    start, end = raw.find('['), raw.rfind(']')
+    if start == -1 or end <= start:
+        return []
+    try:
+        data = json.loads(raw[start:end + 1])
+    except ValueError:
+        return []
+    items = []
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        question = str(item.get('question', '')).strip()
+        if question:
+            items.append({
+                'question': question,
+                'hint': str(item.get('hint', '')).strip(),
+                'answer': str(item.get('answer', '')).strip(),
+            })
+    return items
+
+_topup_locks = {}
+_topup_locks_guard = threading.Lock()
+
+@contextmanager
+def topup_lock(c, key):
+    """Only one top-up per (company, role, type) at a time; others wait, then re-check the bank"""
+    with _topup_locks_guard:
+        lock = _topup_locks.setdefault(key, threading.Lock())
+    with lock:
+        # Gunicorn workers don't share memory: Postgres advisory lock covers them
+        if os.environ.get('DATABASE_URL'):
+            c.execute("SELECT pg_advisory_lock(hashtext(%s))", ("|".join(key),))
+        try:
+            yield
+        finally:
+            if os.environ.get('DATABASE_URL'):
+                c.execute("SELECT pg_advisory_unlock(hashtext(%s))", ("|".join(key),))
+
+def count_unseen_questions(c, key, email):
+    if os.environ.get('DATABASE_URL'):
+        c.execute("""SELECT COUNT(*) AS total FROM question_bank
+                     WHERE company_key = %s AND role_key = %s AND q_type_key = %s
+                     AND id NOT IN (SELECT question_id FROM question_seen WHERE user_email = %s)""", key + (email,))
+    else:
+        c.execute("""SELECT COUNT(*) AS total FROM question_bank
+                     WHERE company_key = ? AND role_key = ? AND q_type_key = ?
+                     AND id NOT IN (SELECT question_id FROM question_seen WHERE user_email = ?)""", key + (email,))
+    return c.fetchone()['total']
+
+def sample_unseen_questions(c, key, email, count):
+    if os.environ.get('DATABASE_URL'):
+        c.execute("""SELECT id, question, hint, answer FROM question_bank
+                     WHERE company_key = %s AND role_key = %s AND q_type_key = %s
+                     AND id NOT IN (SELECT question_id FROM question_seen WHERE user_email = %s)
+                     ORDER BY RANDOM() LIMIT %s""", key + (email, count))
+    else:
+        c.execute("""SELECT id, question, hint, answer FROM question_bank
+                     WHERE company_key = ? AND role_key = ? AND q_type_key = ?
+                     AND id NOT IN (SELECT question_id FROM question_seen WHERE user_email = ?)
+                     ORDER BY RANDOM() LIMIT ?""", key + (email, count))
+    return c.fetchall()
+
+def recent_bank_questions(c, key):
+    if os.environ.get('DATABASE_URL'):
+        c.execute("SELECT question FROM question_bank WHERE company_key = %s AND role_key = %s AND q_type_key = %s ORDER BY id DESC LIMIT %s",
+                 key + (QUESTION_AVOID_LIMIT,))
+    else:
+        c.execute("SELECT question FROM question_bank WHERE company_key = ? AND role_key = ? AND q_type_key = ? ORDER BY id DESC LIMIT ?",
+                 key + (QUESTION_AVOID_LIMIT,))
+    return [row['question'] for row in c.fetchall()]
+
+def store_questions(c, key, items):
+    """Insert generated items, skipping near-duplicates of what the bank already holds"""
+    if os.environ.get('DATABASE_URL'):
+        c.execute("SELECT question FROM question_bank WHERE company_key = %s AND role_key = %s AND q_type_key = %s", key)
+    else:
+        c.execute("SELECT question FROM question_bank WHERE company_key = ? AND role_key = ? AND q_type_key = ?", key)
+    known = [_question_terms(row['question']) for row in c.fetchall()]
+
+    stored = 0
+    for item in items:
+        terms = _question_terms(item['question'])
+        if any(is_similar_question(terms, other) for other in known):
+            continue
+        known.append(terms)
+        if os.environ.get('DATABASE_URL'):
+            c.execute("INSERT INTO question_bank (company_key, role_key, q_type_key, question, hint, answer) VALUES (%s, %s, %s, %s, %s, %s) ON CONFLICT DO NOTHING",
+                     key + (item['question'], item['hint'], item['answer']))
+        else:
+            c.execute("INSERT OR IGNORE INTO question_bank (company_key, role_key, q_type_key, question, hint, answer) VALUES (?, ?, ?, ?, ?, ?)",
+                     key + (item['question'], item['hint'], item['answer']))
+        stored += c.rowcount
+    return stored
+
+def mark_questions_seen(c, email, questions):
+    for q in questions:
+        if os.environ.get('DATABASE_URL'):
+            c.execute("INSERT INTO question_seen (user_email, question_id) VALUES (%s, %s) ON CONFLICT DO NOTHING", (email, q['id']))
+        else:
+            c.execute("INSERT OR IGNORE INTO question_seen (user_email, question_id) VALUES (?, ?)", (email, q['id']))
+
+def top_up_questions(conn, c, key, email, company, role, q_type, count, unseen):
+    """Ask the LLM for more bank items until this user has count unseen; returns the last error"""
+    for _ in range(QUESTION_TOPUP_ATTEMPTS):
+        if unseen >= count:
+            break
+        needed = count - unseen + QUESTION_TOPUP_EXTRA
+        avoid = "\n".join(f"- {q}" for q in recent_bank_questions(c, key))
+
+        prompt = f"""
+    Act as a Senior Interviewer at {company}.
+    Role: {role}.
+    
+    Task: Generate {needed} {q_type} interview questions.
+    FOR EACH QUESTION, PROVIDE A ONE SENTENCE HINT AND A CONCISE "MODEL ANSWER".
+    Do NOT repeat or rephrase any of these existing questions:
+    {avoid or "- (none yet)"}
+    
+    OUTPUT JSON ONLY. NO MARKDOWN. NO HTML.
+    Use this exact structure:
+    [
+        {{"question": "Question Text", "hint": "One sentence hint", "answer": "Professional, concise model answer"}}
+    ]
+    """
+        
+        try:
+            completion = client.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
+                model="llama-3.1-8b-instant"
+            )
+            items = parse_question_items(completion.choices[0].message.content)
+            if store_questions(c, key, items):
+                conn.commit()
+                unseen = count_unseen_questions(c, key, email)
+        except Exception as e:
+            # A failed INSERT aborts the whole Postgres transaction
+            conn.rollback()
+            return e
+    return None
+
+# --- HTTP CACHING & COMPRESSION ---
+
+COMPRESS_MIN_SIZE = 500
+# Dynamic bodies only: static files are sent as direct_passthrough and skipped below
+COMPRESS_MIMETYPES = {'text/html', 'text/plain', 'application/json'}
+JOB_CACHE_TTL = 3600  # Seconds a job search result stays fresh
+STATIC_MAX_AGE = 31536000  # Only for fingerprinted (?v=) static URLs
+
+_static_hashes = {}
+
+def static_file_hash(filename):
+    if filename not in _static_hashes:
+        path = os.path.join(app.static_folder, filename)
+        try:
+            with open(path, 'rb') as f:
+                _static_hashes[filename] = hashlib.md5(f.read()).hexdigest()[:10]
+        except OSError:
+            _static_hashes[filename] = None
+    return _static_hashes[filename]
+
+@app.url_defaults
+def static_fingerprint(endpoint, values):
+    """Append ?v=<content hash> to static URLs so a changed file gets a new URL"""
+    if endpoint == 'static' and 'filename' in values:
+        file_hash = static_file_hash(values['filename'])
+        if file_hash:
+            values['v'] = file_hash
+
+def negotiate_encoding():
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+@app.after_request
+def finalize_response(response):
+    """Long-lived static caching, on-the-fly compression and ETag/304 handling"""
+    # Only a hash matching the current file is safe to cache "forever"
+    if (request.endpoint == 'static' and request.args.get('v')
+            and request.args['v'] == static_file_hash(request.view_args['filename'])):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_MAX_AGE
+        response.cache_control.immutable = True
+    # send_file responses handle their own conditional requests
+    if response.direct_passthrough or response.is_streamed:
+        return response
+
+    if (response.status_code == 200 and response.mimetype in COMPRESS_MIMETYPES
+            and 'Content-Encoding' not in response.headers):
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate_encoding()
+        data = response.get_data()
+        if encoding and len(data) >= COMPRESS_MIN_SIZE:
+            if encoding == 'br':
+                response.set_data(brotli.compress(data, quality=5))
+            else:
+                response.set_data(gzip.compress(data, compresslevel=6))
+            response.headers['Content-Encoding'] = encoding
+            # A strong ETag must differ per encoding
+            etag, weak = response.get_etag()
+            if etag:
+                response.set_etag(f"{etag}-{encoding}", weak=weak)
+
+    if response.get_etag()[0]:
+        response.make_conditional(request)
+    return response
+
 # --- RUN DB INIT ON STARTUP ---
 with app.app_context():
     init_db()
@@ -230,12 +704,13 @@ def analyze_resume():
     target_role = request.form.get('job_role')
     text = extract_text_from_pdf(file)
     if len(text) < 50: return "Resume is too short or unreadable.", 400
+    resume_text = condense_resume(text, target_role, 'resume')
 
     # THE HIGH QUALITY PROMPT
     prompt = f"""
     Role: Expert Resume Strategist.
     Task: Audit this resume for the role of "{target_role}".
-    Resume Content: "{text[:3000]}"
+    Resume Content: "{resume_text}"
     
     OUTPUT HTML ONLY. NO MARKDOWN.
     
@@ -362,7 +837,12 @@ def view_report(report_id):
     conn.close()
     
     if report:
-        return render_template('resume_result.html', analysis=report['content'])
+        # Reports never change once saved: let the browser revalidate with a 304
+        response = make_response(render_template('resume_result.html', analysis=report['content']))
+        response.set_etag(hashlib.sha256(response.get_data()).hexdigest())
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
     else:
         return "Report not found", 404
 
@@ -380,54 +860,40 @@ def generate_interview_questions():
     role = request.form.get('role')
     company = request.form.get('company')
     q_type = request.form.get('q_type')
-    count = request.form.get('count')
+    try:
+        count = max(1, min(int(request.form.get('count', 5)), QUESTION_MAX_COUNT))
+    except ValueError:
+        count = 5
     
-    if 'resume' not in request.files: return "No file", 400
-    file = request.files['resume']
-    text = extract_text_from_pdf(file)
+    email = session['user']['email']
+    key = (normalize_bank_key(company), normalize_bank_key(role), normalize_bank_key(q_type))
 
-    prompt = f"""
-    Act as a Senior Interviewer at {company}.
-    Role: {role}.
-    Candidate Resume: "{text[:2000]}"
-    
-    Task: Generate {count} {q_type} interview questions.
-    FOR EACH QUESTION, PROVIDE A CONCISE "MODEL ANSWER".
-    
-    OUTPUT HTML ONLY. NO MARKDOWN.
-    Use this exact card structure for EACH question:
-    
-    <div class="qa-card mb-4 animate-fade-up p-4 border rounded-4 shadow-sm bg-white">
-        <div class="d-flex justify-content-between align-items-start mb-3">
-            <h5 class="fw-bold text-dark w-100">Q: {{Question Text}}</h5>
-        </div>
-        <div class="d-flex align-items-center gap-2 mb-3">
-            <button class="btn btn-sm btn-outline-danger rounded-pill fw-bold" onclick="toggleTimer(this)">
-                <i class="fas fa-stopwatch me-1"></i> Timer
-            </button>
-            <span class="timer-display fw-bold text-danger me-3"></span>
-            <button class="btn btn-sm btn-outline-success rounded-pill fw-bold" onclick="this.closest('.qa-card').querySelector('.answer-box').classList.toggle('d-none')">
-                <i class="fas fa-eye me-1"></i> Show Answer
-            </button>
-        </div>
-        <div class="p-3 bg-light rounded border small text-muted mb-2">
-            <strong><i class="fas fa-lightbulb text-warning me-1"></i> Hint:</strong> {{One sentence hint}}
-        </div>
-        <div class="answer-box d-none p-3 bg-success bg-opacity-10 border border-success rounded text-dark small">
-            <h6 class="fw-bold text-success mb-2"><i class="fas fa-check-circle me-2"></i>Model Answer</h6>
-            {{Write a professional, concise model answer here}}
-        </div>
-    </div>
-    """
-    
-    try:
-        completion = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.1-8b-instant"
-        )
-        return completion.choices[0].message.content.replace("```html", "").replace("```", "")
-    except Exception as e:
-        return f"<div class='alert alert-danger'>AI Error: {e}</div>"
+    conn = get_db_connection()
+    c = conn.cursor()
+    unseen = count_unseen_questions(c, key, email)
+
+    # Only hit the LLM when the bank can't cover this user. The bank is shared by
+    # every user, so the prompt must stay generic (no resume details).
+    error = None
+    if unseen < count:
+        with topup_lock(c, key):
+            # Another request may have filled the bank while we waited
+            unseen = count_unseen_questions(c, key, email)
+            error = top_up_questions(conn, c, key, email, company, role, q_type, count, unseen)
+
+    questions = sample_unseen_questions(c, key, email, count)
+    if not questions:
+        conn.close()
+        return f"<div class='alert alert-danger'>AI Error: {error or 'No questions could be generated.'}</div>"
+
+    mark_questions_seen(c, email, questions)
+    conn.commit()
+    conn.close()
+
+    notice = None
+    if len(questions) < count:
+        notice = f"Only {len(questions)} new questions are available for this combination right now. Try again later for more."
+    return render_template('interview_cards.html', questions=questions, notice=notice)
 
 @app.route('/interview/save', methods=['POST'])
 def save_interview_result():
@@ -458,46 +924,76 @@ def save_interview_result():
 def job_search_module():
     if 'user' not in session: return redirect('/')
     return render_template('jobs.html')
-@app.route('/jobs/search', methods=['POST'])
+@app.route('/jobs/search', methods=['GET', 'POST'])
 def search_jobs():
     if 'user' not in session: return "Unauthorized", 401
     
-    role = request.form.get('role')
-    location = request.form.get('location')
-    
-    # 1. API Call
-    try:
-        url = "https://api.adzuna.com/v1/api/jobs/in/search/1"
-        params = {
-            "app_id": os.getenv("ADZUNA_APP_ID"),
-            "app_key": os.getenv("ADZUNA_APP_KEY"),
-            "results_per_page": 10,
-            "what": role,
-            "where": location,
-            "content-type": "application/json"
-        }
-        response = requests.get(url, params=params)
-        data = response.json()
-        
-        jobs_data = []
-        for job in data.get('results', []):
-            jobs_data.append({
-                "title": job.get('title'),
-                "company": job.get('company', {}).get('display_name'),
-                "location": job.get('location', {}).get('display_name'),
-                "desc": job.get('description')[:140] + "...",
-                "full_desc": job.get('description'), 
-                "url": job.get('redirect_url'),
-                "date": job.get('created')[:10] # Extracts YYYY-MM-DD
-            })
+    role = request.values.get('role')
+    location = request.values.get('location')
+    search_key = f"{(role or '').strip().lower()}_{(location or '').strip().lower()}_in"
+    is_postgres = os.environ.get('DATABASE_URL') is not None
+
+    # 1. Cache Lookup
+    jobs_data = None
+    conn = get_db_connection()
+    c = conn.cursor()
+    if is_postgres:
+        c.execute("SELECT json_data, updated_at FROM job_cache WHERE search_key = %s", (search_key,))
+    else:
+        c.execute("SELECT json_data, updated_at FROM job_cache WHERE search_key = ?", (search_key,))
+    cached = c.fetchone()
+    if cached:
+        age = datetime.datetime.now() - datetime.datetime.strptime(cached['updated_at'], "%Y-%m-%d %H:%M:%S")
+        if age.total_seconds() < JOB_CACHE_TTL:
+            jobs_data = json.loads(cached['json_data'])
+
+    # 2. API Call
+    if jobs_data is None:
+        try:
+            url = "https://api.adzuna.com/v1/api/jobs/in/search/1"
+            params = {
+                "app_id": os.getenv("ADZUNA_APP_ID"),
+                "app_key": os.getenv("ADZUNA_APP_KEY"),
+                "results_per_page": 10,
+                "what": role,
+                "where": location,
+                "content-type": "application/json"
+            }
+            response = requests.get(url, params=params)
+            data = response.json()
             
-    except Exception as e:
-        return f"<div class='alert alert-danger'>API Error: {e}</div>"
+            jobs_data = []
+            for job in data.get('results', []):
+                jobs_data.append({
+                    "title": job.get('title'),
+                    "company": job.get('company', {}).get('display_name'),
+                    "location": job.get('location', {}).get('display_name'),
+                    "desc": job.get('description')[:140] + "...",
+                    "full_desc": job.get('description'), 
+                    "url": job.get('redirect_url'),
+                    "date": job.get('created')[:10] # Extracts YYYY-MM-DD
+                })
+                
+        except Exception as e:
+            conn.close()
+            return f"<div class='alert alert-danger'>API Error: {e}</div>"
+
+        if jobs_data:
+            now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if is_postgres:
+                c.execute("""INSERT INTO job_cache (search_key, json_data, updated_at) VALUES (%s, %s, %s)
+                             ON CONFLICT (search_key) DO UPDATE SET json_data = EXCLUDED.json_data, updated_at = EXCLUDED.updated_at""",
+                         (search_key, json.dumps(jobs_data), now))
+            else:
+                c.execute("INSERT OR REPLACE INTO job_cache (search_key, json_data, updated_at) VALUES (?, ?, ?)",
+                         (search_key, json.dumps(jobs_data), now))
+            conn.commit()
+    conn.close()
 
     if not jobs_data:
         return "<div class='text-center mt-5'><h5 class='text-muted'>No jobs found. Check API Keys.</h5></div>"
 
-    # 2. Generate Beautiful HTML
+    # 3. Generate Beautiful HTML
     html = ""
     for job in jobs_data:
         # Generate a cool avatar logo based on company name
@@ -543,7 +1039,14 @@ def search_jobs():
             </div>
         </div>
         """
-    return html
+
+    # 4. Cache Headers (fragment is per-user session, so keep it out of shared caches)
+    response = make_response(html)
+    response.set_etag(hashlib.sha256(html.encode('utf-8')).hexdigest())
+    response.cache_control.private = True
+    response.cache_control.max_age = 600
+    response.vary.add('Cookie')
+    return response
 
 
 @app.route('/jobs/save', methods=['POST'])
@@ -696,6 +1199,8 @@ def nuclear_reset():
     c.execute("DROP TABLE IF EXISTS reports")
     c.execute("DROP TABLE IF EXISTS saved_jobs")
     c.execute("DROP TABLE IF EXISTS job_cache")
+    c.execute("DROP TABLE IF EXISTS question_bank")
+    c.execute("DROP TABLE IF EXISTS question_seen")
     c.execute("DROP TABLE IF EXISTS users") 
     
     conn.commit()